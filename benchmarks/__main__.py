@@ -0,0 +1,55 @@
+import argparse
+import json
+import sys
+
+from benchmarks.suite import BENCHMARKS, run_suite, compare
+from src.logging import error
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmarks hl itself against synthetic projects. No Halide installation is required.')
+    parser.add_argument('--sizes', type=str, default='10,100,1000',
+                        help='comma-separated numbers of generators in the synthetic projects (default: %(default)s)')
+    parser.add_argument('--configs', type=int, default=2,
+                        help='named configurations per generator (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timed runs per benchmark; the best is compared (default: %(default)s)')
+    parser.add_argument('--only', type=str, nargs='+', choices=[b.name for b in BENCHMARKS],
+                        help='run only the named benchmarks')
+    parser.add_argument('--save', type=str, metavar='FILE', help='write the results to FILE as a baseline')
+    parser.add_argument('--compare', type=str, metavar='FILE', help='compare the results against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='fractional slowdown against the baseline reported as a regression (default: %(default)s)')
+
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(',')]
+    except ValueError:
+        error(f'invalid sizes {args.sizes}')
+        sys.exit(1)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    results = run_suite(sizes, repeat=args.repeat, names=args.only, configs_per_generator=args.configs,
+                        log=lambda msg: print(msg, file=sys.stderr))
+
+    table, regressions = compare(results, baseline, args.tolerance)
+    print(table)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if regressions:
+        error(f'{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.formatting import expand_template, Table
+from src.makefile import Makefile
+from src.project import Project, TOOL_DIR
+
+STUB_GENERATOR = '// Stub generator for benchmarking hl. It is never compiled.\n'
+
+# Number of add/delete operations performed by the configuration_edits benchmark. Every edit re-parses the
+# whole Makefile, so large projects get fewer edits to keep the total work (edits * generators) near EDIT_BUDGET.
+MAX_EDITS = 100
+EDIT_BUDGET = 100000
+
+
+# A throwaway project with `size` stub generators, each having `configs_per_generator` named configurations.
+class SyntheticProject(object):
+    def __init__(self, size, configs_per_generator=2):
+        self.size = size
+        self.configs_per_generator = configs_per_generator
+        self.generators = [f'gen{i:06d}' for i in range(size)]
+
+        self._tmpdir = Path(tempfile.mkdtemp(suffix='.hlbench'))
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(self._tmpdir)
+            self.project = Project.create_new('synthetic')
+        finally:
+            os.chdir(old_cwd)
+        self.root = self.project.root
+
+        # Replace the skeleton generator with stubs. These are written directly, rather than through
+        # Project.create_generator, so that setting up large projects isn't itself quadratic.
+        (self.root / 'synthetic.gen.cpp').unlink()
+        for gen in self.generators:
+            with open(self.root / f'{gen}.gen.cpp', 'w') as f:
+                f.write(STUB_GENERATOR)
+
+        cfg_lines = [f'CFG__{gen}__cfg{j} = target=host param{j}={i}\n'
+                     for i, gen in enumerate(self.generators)
+                     for j in range(configs_per_generator)]
+
+        makefile_path = self.root / 'Makefile'
+        with open(makefile_path, 'r') as f:
+            lines = f.readlines()
+        insert_at = lines.index('# Include common support Makefile\n') - 1
+        lines[insert_at:insert_at] = cfg_lines + ['\n']
+        with open(makefile_path, 'w') as f:
+            f.writelines(lines)
+
+        with open(makefile_path, 'r') as f:
+            self._makefile_text = f.read()
+
+    def reset(self):
+        # Undo any changes a benchmark made to the project
+        with open(self.root / 'Makefile', 'w') as f:
+            f.write(self._makefile_text)
+        known = set(self.generators)
+        for gen_file in self.root.glob('*.gen.cpp'):
+            if gen_file.name[:-len('.gen.cpp')] not in known:
+                gen_file.unlink()
+
+    def cleanup(self):
+        shutil.rmtree(self._tmpdir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
+
+
+# A single timed operation. `setup` receives the SyntheticProject and its result is passed to `run`; it is not
+# timed. If `spawns_process` is set, `run` must return the peak RSS of the process it started, which is reported
+# in place of the tracemalloc peak.
+class Benchmark(object):
+    def __init__(self, name: str, run: Callable, *, setup: Optional[Callable] = None, spawns_process: bool = False):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda project: project)
+        self.spawns_process = spawns_process
+
+    def measure(self, project: SyntheticProject, repeat: int):
+        times = []
+        peak_memory = 0
+        for _ in range(repeat):
+            state = self.setup(project)
+            start = time.perf_counter()
+            result = self.run(state)
+            times.append(time.perf_counter() - start)
+            if self.spawns_process:
+                peak_memory = max(peak_memory, result)
+            project.reset()
+
+        if not self.spawns_process:
+            # Tracing slows everything down, so memory is measured in a separate, untimed run.
+            state = self.setup(project)
+            tracemalloc.start()
+            try:
+                self.run(state)
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            project.reset()
+
+        return {'best': min(times), 'mean': sum(times) / len(times), 'peak_memory': peak_memory}
+
+
+def _edit_configurations(args):
+    makefile, generators = args
+    num_edits = max(1, min(len(generators), MAX_EDITS, EDIT_BUDGET // max(1, len(generators))))
+    edits = random.Random(0).sample(generators, num_edits)
+    for gen in edits:
+        makefile.add_configuration(gen, 'bench', 'target=host')
+    for gen in edits:
+        makefile.delete_configuration(gen, 'bench')
+
+
+def _expand_skeleton(generators):
+    with open(TOOL_DIR / 'skeleton' / '${NAME}.gen.cpp', 'r') as f:
+        template = f.read()
+    for gen in generators:
+        expand_template(template, NAME=gen)
+
+
+def _render_table(project):
+    table = Table()
+    table.set_headers('Generator', 'Configuration', 'Parameters')
+    for gen in project.generators:
+        for j in range(project.configs_per_generator):
+            table.add_row(gen, f'cfg{j}', f'target=host param{j}')
+    return str(table)
+
+
+def _run_hl(root, *args):
+    process = subprocess.Popen([sys.executable, str(TOOL_DIR / 'hl'), *args], cwd=str(root),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    if process.returncode != 0:
+        raise RuntimeError(f'hl {" ".join(args)} failed with exit code {process.returncode}')
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return rusage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+BENCHMARKS = [
+    Benchmark('makefile_parse', lambda project: Makefile(project.root)),
+    Benchmark('configuration_edits', _edit_configurations,
+              setup=lambda project: (Makefile(project.root), project.generators)),
+    Benchmark('linearize_index', lambda makefile: makefile._linearize_index(),
+              setup=lambda project: Makefile(project.root)),
+    Benchmark('expand_template', _expand_skeleton, setup=lambda project: project.generators),
+    Benchmark('table_render', _render_table),
+    Benchmark('cli_list', lambda project: _run_hl(project.root, 'list'), spawns_process=True),
+    Benchmark('cli_create', lambda project: _run_hl(project.root, 'create', 'generator', 'bench_new'),
+              spawns_process=True),
+]
+
+
+# Runs the selected benchmarks for each project size. Returns a dict from '<name>[<size>]' to measurements.
+def run_suite(sizes, *, repeat=5, names=None, configs_per_generator=2, log=None):
+    benchmarks = [b for b in BENCHMARKS if not names or b.name in names]
+    results = {}
+    for size in sizes:
+        with SyntheticProject(size, configs_per_generator) as project:
+            for benchmark in benchmarks:
+                key = f'{benchmark.name}[{size}]'
+                if log:
+                    log(f'running {key}')
+                results[key] = benchmark.measure(project, repeat)
+    return results
+
+
+# Returns a Table comparing results against a baseline, and the list of keys that regressed.
+def compare(results, baseline, tolerance):
+    table = Table()
+    table.set_headers('Benchmark', 'Best (ms)', 'Mean (ms)', 'Peak memory (KiB)', 'Baseline (ms)', 'Change')
+
+    regressions = []
+    for key, result in results.items():
+        base = (baseline or {}).get(key)
+        change = ''
+        if base:
+            ratio = result['best'] / base['best']
+            change = f'{ratio - 1:+.1%}'
+            if ratio > 1 + tolerance:
+                change += ' REGRESSION'
+                regressions.append(key)
+        table.add_row(key,
+                      f'{result["best"] * 1e3:.3f}',
+                      f'{result["mean"] * 1e3:.3f}',
+                      f'{result["peak_memory"] / 1024:.0f}',
+                      f'{base["best"] * 1e3:.3f}' if base else '',
+                      change)
+    return table, regressions
@@ -1,12 +1,16 @@
 import argparse
 import itertools
 import os
+import signal
+import subprocess
 import sys
 from pathlib import Path
 
+from src import worker
 from src.formatting import Table
 from src.logging import error
-from src.project import Project
+from src.project import Project, BUILD_PROFILES, DEFAULT_BUILD_PROFILE, GENERATOR_TEMPLATES, \
+    DEFAULT_GENERATOR_TEMPLATE
 
 TOOL_DIR = Path(os.path.dirname(os.path.realpath(os.path.join(__file__, '..'))))
 
@@ -21,6 +25,9 @@ The available hlgen commands are:
    create     Create a new Halide project, generator, or configuration
    delete     Remove an existing generator or configuration
    list       List generators and their configurations
+   build      Build the project, using the worker pool if one is running
+   worker     Run a build-worker pool shared by every build on this machine
+   submit     Run a build command through the worker pool
 ''')
         parser.add_argument('command', help='Subcommand to run')
 
@@ -127,26 +134,33 @@ The available hlgen commands are:
     def create_project(self, argv):
         parser = argparse.ArgumentParser(
             description='Create a new Halide project',
-            usage='hlgen create project <name>')
+            usage='hlgen create project [--profile <profile>] <name>')
         parser.add_argument('name', type=str,
                             help='The name of the project. This will also be the name of the directory created.')
+        parser.add_argument('--profile', type=str, choices=BUILD_PROFILES, default=DEFAULT_BUILD_PROFILE,
+                            help='The default build profile for the generator and runners. '
+                                 'Can be overridden per build with `make HLGEN_PROFILE=<profile>`.')
 
         args = parser.parse_args(argv)
 
-        project = Project.create_new(args.name)
+        project = Project.create_new(args.name, args.profile)
         project.save()
 
     def create_generator(self, argv):
         parser = argparse.ArgumentParser(
             description='Create a new Halide generator',
-            usage='hlgen create generator <name>')
+            usage='hlgen create generator [--template <template>] <name>')
         parser.add_argument('name', type=str,
                             help='The name of the generator. This will also be the name of the source file created.')
+        parser.add_argument('--template', type=str, choices=list(GENERATOR_TEMPLATES),
+                            default=DEFAULT_GENERATOR_TEMPLATE,
+                            help='The skeleton to start the generator from. Templates other than '
+                                 'the default come with a tunable schedule and example configurations.')
 
         args = parser.parse_args(argv)
 
         project = Project()
-        project.create_generator(args.name)
+        project.create_generator(args.name, args.template)
         project.save()
 
     def create_configuration(self, argv):
@@ -169,6 +183,96 @@ place or write '(default)'
         project.create_configuration(args.gen, self._normalize_config_name(args.name), args.params)
         project.save()
 
+    def build(self, argv):
+        parser = argparse.ArgumentParser(
+            description='Build the project in the current directory',
+            usage='hlgen build [--profile <profile>] [-j/--jobs <n>] [<targets>...]')
+        parser.add_argument('--profile', type=str, choices=BUILD_PROFILES,
+                            help='The build profile to use instead of the one set in the Makefile.')
+        parser.add_argument('-j', '--jobs', type=int,
+                            help='The number of jobs make may run at once. Defaults to the worker pool size '
+                                 'when a worker is running, and to 1 otherwise.')
+        parser.add_argument('targets', nargs='*', help='The make targets to build.')
+
+        args = parser.parse_args(argv)
+
+        project = Project()
+        socket_path = worker.default_socket_path()
+        pool = worker.status(socket_path)
+
+        command = ['make', '-C', str(project.root)]
+        if args.jobs or pool:
+            command.append(f'-j{args.jobs or pool["max_jobs"]}')
+        if args.profile:
+            command.append(f'HLGEN_PROFILE={args.profile}')
+        command.append(f'HLGEN_TOOL={os.path.realpath(sys.argv[0])}')
+        command.extend(args.targets)
+
+        env = dict(os.environ, HLGEN_WORKER_SOCKET=str(socket_path))
+        sys.exit(subprocess.call(command, env=env))
+
+    def worker(self, argv):
+        parser = argparse.ArgumentParser(
+            description='Run a build-worker pool. Builds that find its socket wait for a free slot before '
+                        'running generators and compilers, and identical jobs in flight are only run once.',
+            usage='hlgen worker [--socket <path>] [-j/--jobs <n>] [--job-memory <MB>] [--shared] [--status]')
+        parser.add_argument('--socket', type=str,
+                            help=f'The socket to listen on. Defaults to $HLGEN_WORKER_SOCKET or '
+                                 f'{worker.default_socket_path()}')
+        parser.add_argument('-j', '--jobs', type=int,
+                            help='The maximum number of jobs to run at once. Defaults to the number of cores.')
+        parser.add_argument('--job-memory', type=int, default=worker.DEFAULT_JOB_MEMORY,
+                            help='The memory in MB each job is expected to need. No job is started while less '
+                                 'than this is available. (default: %(default)s)')
+        parser.add_argument('--shared', action='store_true',
+                            help='accept jobs from other users. Clients will reuse each other\'s outputs, '
+                                 'so only share a worker between users who trust each other.')
+        parser.add_argument('--status', action='store_true', help='print the status of a running worker and exit')
+
+        args = parser.parse_args(argv)
+        socket_path = Path(args.socket) if args.socket else worker.default_socket_path()
+
+        if args.status:
+            pool = worker.status(socket_path)
+            if not pool:
+                raise ValueError(f'no worker is listening on {socket_path}')
+            table = Table()
+            table.set_headers('Running', 'Waiting', 'Max jobs')
+            table.add_row(str(pool['running']), str(pool['waiting']), str(pool['max_jobs']))
+            print(table)
+            return
+
+        pool = worker.WorkerPool(args.jobs, args.job_memory)
+        print(f'hl worker listening on {socket_path}, running up to {pool.max_jobs} jobs at once', file=sys.stderr)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            worker.serve(socket_path, pool, shared=args.shared)
+        except KeyboardInterrupt:
+            pass
+
+    def submit(self, argv):
+        parser = argparse.ArgumentParser(
+            description='Run a build command through the worker pool, or directly if no worker is running',
+            usage='''hlgen submit [--socket <path>] [--input <file>]... [--output <file>]... -- <command>...
+
+Commands with the same inputs and arguments that are in flight at the same
+time are only run once; the others receive a copy of the listed outputs.
+Commands without outputs are never merged.''')
+        parser.add_argument('--socket', type=str, help='The socket of the worker.')
+        parser.add_argument('--input', type=str, action='append', default=[],
+                            help='A file the command reads. Its contents identify the job.')
+        parser.add_argument('--output', type=str, action='append', default=[],
+                            help='A file the command writes, relative to the current directory.')
+        parser.add_argument('command', nargs=argparse.REMAINDER, help='The command to run.')
+
+        args = parser.parse_args(argv)
+        command = args.command[1:] if args.command[:1] == ['--'] else args.command
+        if not command:
+            raise ValueError('no command given')
+
+        socket_path = Path(args.socket) if args.socket else None
+        sys.exit(worker.submit(command, inputs=args.input, outputs=args.output, socket_path=socket_path))
+
     @staticmethod
     def _normalize_config_name(config_name):
         if config_name is None or config_name == '' or config_name == '(default)':
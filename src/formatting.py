@@ -28,7 +28,7 @@ def expand_template(template, env=None, **kwargs):
 
         args = [ast.arg(arg=name, annotation=None) for name in names]
         body = ast.Lambda(
-            ast.arguments(args=args, defaults=[], kwonlyargs=[], kw_defaults=[]),
+            ast.arguments(posonlyargs=[], args=args, defaults=[], kwonlyargs=[], kw_defaults=[]),
             body)
 
         expression.body = body
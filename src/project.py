@@ -8,6 +8,24 @@ from src.makefile import Makefile
 
 TOOL_DIR = Path(os.path.dirname(os.path.realpath(os.path.join(__file__, '..'))))
 
+BUILD_PROFILES = ['debug', 'release', 'relwithdebinfo']
+DEFAULT_BUILD_PROFILE = 'release'
+
+# Generator templates and the configurations written to the Makefile alongside them.
+# The 'copy' template is the plain skeleton generator; the others live in templates/.
+GENERATOR_TEMPLATES = {
+    'copy': [],
+    'pointwise': [('serial', 'parallel_split=0'),
+                  ('auto', 'auto_schedule=true')],
+    'stencil': [('small_tiles', 'tile_x=64 tile_y=16'),
+                ('auto', 'auto_schedule=true')],
+    'histogram': [('coarse', 'parallel_split=256'),
+                  ('auto', 'auto_schedule=true')],
+    'matmul': [('wide_tiles', 'tile_x=64 tile_y=4 vector_width=16'),
+               ('auto', 'auto_schedule=true')],
+}
+DEFAULT_GENERATOR_TEMPLATE = 'copy'
+
 
 class Project(object):
     def __init__(self, root: Optional[Union[Path, str]] = None):
@@ -22,9 +40,11 @@ class Project(object):
         self._makefile = None
 
     @staticmethod
-    def create_new(project_name):
+    def create_new(project_name, profile=DEFAULT_BUILD_PROFILE):
         if os.path.isdir(project_name):
             raise ValueError(f'project directory {project_name} already exists!')
+        if profile not in BUILD_PROFILES:
+            raise ValueError(f'unknown build profile {profile}. expected one of: {", ".join(BUILD_PROFILES)}')
 
         os.mkdir(project_name)
         project = Project(os.path.realpath(project_name))
@@ -34,7 +54,7 @@ class Project(object):
 
             os.makedirs(project.root / relative, exist_ok=True)
             for file_name in files:
-                project._copy_from_skeleton(relative / file_name, {'NAME': project_name})
+                project._copy_from_skeleton(relative / file_name, {'NAME': project_name, 'PROFILE': profile})
         return project
 
     def get_makefile(self):
@@ -50,10 +70,20 @@ class Project(object):
         if self._makefile:
             self._makefile.save()
 
-    def create_generator(self, generator_name):
+    def create_generator(self, generator_name, template=DEFAULT_GENERATOR_TEMPLATE):
+        if template not in GENERATOR_TEMPLATES:
+            raise ValueError(f'unknown generator template {template}. '
+                             f'expected one of: {", ".join(GENERATOR_TEMPLATES)}')
         makefile = self.get_makefile()
-        self._copy_from_skeleton(Path('${NAME}.gen.cpp'), {'NAME': generator_name})
+        env = {'NAME': generator_name}
+        if template == DEFAULT_GENERATOR_TEMPLATE:
+            self._copy_from_skeleton(Path('${NAME}.gen.cpp'), env)
+        else:
+            self._copy_file(TOOL_DIR / 'templates' / f'{template}.gen.cpp',
+                            self.root / '${NAME}.gen.cpp', env)
         makefile.add_generator(generator_name)
+        for config_name, params in GENERATOR_TEMPLATES[template]:
+            makefile.add_configuration(generator_name, config_name, params)
 
     def create_configuration(self, generator_name, config_name, params):
         if isinstance(params, list):
@@ -79,9 +109,10 @@ class Project(object):
         makefile.delete_generator(name)
 
     def _copy_from_skeleton(self, relative, env):
-        skel_file = TOOL_DIR / 'skeleton' / relative
-        proj_file = self.root / relative
+        self._copy_file(TOOL_DIR / 'skeleton' / relative, self.root / relative, env)
 
+    @staticmethod
+    def _copy_file(skel_file, proj_file, env):
         with open(skel_file, 'r') as f:
             content = expand_template(f.read(), env)
 
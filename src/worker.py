@@ -0,0 +1,302 @@
+import hashlib
+import json
+import os
+import shutil
+import socket
+import socketserver
+import struct
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.logging import warn
+
+# Megabytes of memory each job is expected to need. Linking against libHalide and running generators
+# routinely takes this much, so it is used to cap the number of jobs that run at once.
+DEFAULT_JOB_MEMORY = 1024
+
+
+def default_socket_path():
+    if os.environ.get('HLGEN_WORKER_SOCKET'):
+        return Path(os.environ['HLGEN_WORKER_SOCKET'])
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(runtime_dir) / 'hl-worker.sock'
+
+
+def _meminfo(field):
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def _file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def job_key(command: List[str], inputs: List[str]):
+    # Inputs are identified by their contents rather than their paths so that the same job submitted from two
+    # checkouts gets the same key. Arguments naming an input are replaced by its digest for the same reason.
+    digests = {os.path.normpath(path): _file_digest(path) for path in inputs}
+    argv = [digests.get(os.path.normpath(arg), arg) for arg in command]
+    payload = json.dumps([argv, sorted(digests.values())])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _Job(object):
+    def __init__(self, key, cwd):
+        self.key = key
+        self.cwd = cwd
+        self.finished = False
+        self.ok = False
+
+
+class WorkerPool(object):
+    def __init__(self, max_jobs: Optional[int] = None, job_memory: int = DEFAULT_JOB_MEMORY):
+        total_memory = _meminfo('MemTotal')
+        max_jobs = max_jobs or os.cpu_count() or 1
+        if total_memory:
+            max_jobs = max(1, min(max_jobs, total_memory // job_memory))
+
+        self.max_jobs = max_jobs
+        self.job_memory = job_memory
+        self.running = 0
+        self.waiting = 0
+
+        self._cond = threading.Condition()
+        self._inflight: Dict[str, _Job] = {}
+
+    def acquire(self, key: Optional[str], cwd: str):
+        # Returns (job, True) once the caller may run the job, or (job, False) if an identical job
+        # finished successfully while waiting, in which case its outputs can be found under job.cwd.
+        with self._cond:
+            self.waiting += 1
+            try:
+                while key is not None and key in self._inflight:
+                    job = self._inflight[key]
+                    self._cond.wait_for(lambda: job.finished)
+                    if job.ok:
+                        return job, False
+
+                job = _Job(key, cwd)
+                if key is not None:
+                    self._inflight[key] = job
+
+                # Available memory changes without notice, so poll it while waiting for a slot
+                while not self._has_capacity():
+                    self._cond.wait(1.0)
+                self.running += 1
+                return job, True
+            finally:
+                self.waiting -= 1
+
+    def release(self, job: _Job, ok: bool):
+        with self._cond:
+            self.running -= 1
+            job.finished = True
+            job.ok = ok
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+            self._cond.notify_all()
+
+    def _has_capacity(self):
+        if self.running >= self.max_jobs:
+            return False
+        if self.running == 0:
+            return True
+        available = _meminfo('MemAvailable')
+        return available is None or available >= self.job_memory
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        if not self.server.shared and not self._same_user():
+            warn('rejected worker connection from another user')
+            self._write({'error': 'this worker only accepts jobs from the user running it (see --shared)'})
+            return
+
+        request = self._read()
+        if not isinstance(request, dict):
+            self._write({'error': 'malformed request'})
+            return
+
+        pool = self.server.pool
+        if request.get('op') == 'status':
+            self._write({'running': pool.running, 'waiting': pool.waiting, 'max_jobs': pool.max_jobs})
+            return
+        if request.get('op') != 'acquire':
+            self._write({'error': f'unknown op {request.get("op")}'})
+            return
+        if not isinstance(request.get('cwd'), str):
+            self._write({'error': 'acquire requires a cwd'})
+            return
+
+        job, is_leader = pool.acquire(request.get('key'), request['cwd'])
+        if not is_leader:
+            self._write({'status': 'done', 'cwd': job.cwd})
+            return
+
+        # A client that goes away without reporting back is treated as a failed job
+        ok = False
+        try:
+            if self._write({'status': 'run'}):
+                reply = self._read()
+                ok = bool(isinstance(reply, dict) and reply.get('op') == 'release' and reply.get('ok'))
+        finally:
+            pool.release(job, ok)
+
+    def _same_user(self):
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        creds = self.request.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', creds)
+        return uid == os.getuid()
+
+    # Clients may disconnect or send garbage at any point; both show up as a None message or a failed write
+    def _read(self):
+        try:
+            line = self.rfile.readline()
+            return json.loads(line) if line else None
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, message):
+        try:
+            self.wfile.write((json.dumps(message) + '\n').encode())
+            self.wfile.flush()
+        except OSError:
+            return False
+        return True
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def create_server(socket_path: Path, pool: WorkerPool, *, shared=False):
+    if socket_path.exists():
+        sock = _connect(socket_path)
+        if sock:
+            sock.close()
+            raise ValueError(f'a worker is already listening on {socket_path}')
+        socket_path.unlink()
+    os.makedirs(str(socket_path.parent), exist_ok=True)
+
+    server = _Server(str(socket_path), _RequestHandler)
+    server.pool = pool
+    server.shared = shared
+    # Jobs from other users are only accepted with --shared, since clients trust the outputs the worker points
+    # them to. The socket permissions follow suit.
+    os.chmod(str(socket_path), 0o666 if shared else 0o600)
+    return server
+
+
+def serve(socket_path: Path, pool: WorkerPool, *, shared=False):
+    server = create_server(socket_path, pool, shared=shared)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# Returns None if no worker is listening on socket_path, including when only a stale socket is left behind.
+# Any other failure, such as a worker that belongs to another user, is an error.
+def _connect(socket_path: Path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    except PermissionError:
+        sock.close()
+        raise ValueError(f'permission denied connecting to the worker at {socket_path}. '
+                         f'it may belong to another user who has not started it with --shared')
+    return sock
+
+
+def _copy_outputs(leader_cwd, outputs):
+    cwd = os.getcwd()
+    if os.path.realpath(leader_cwd) == os.path.realpath(cwd):
+        return all(os.path.exists(output) for output in outputs)
+    try:
+        for output in outputs:
+            os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+            # Copy without timestamps, so the outputs are newer than this checkout's inputs
+            shutil.copyfile(os.path.join(leader_cwd, output), output)
+            shutil.copymode(os.path.join(leader_cwd, output), output)
+    except OSError as e:
+        warn(f'could not copy outputs of identical job from {leader_cwd}: {e}')
+        return False
+    return True
+
+
+def submit(command: List[str], *, inputs: List[str] = (), outputs: List[str] = (), socket_path: Path = None):
+    # Runs command once the worker has a free slot, or copies its outputs from an identical in-flight job.
+    # Without a worker the command simply runs here. Returns the command's exit code.
+    socket_path = socket_path or default_socket_path()
+
+    # Without outputs there is nothing to share, so only the concurrency limit applies
+    key = job_key(command, inputs) if outputs else None
+
+    returncode = _submit(socket_path, command, key, outputs)
+    if returncode is None:
+        # The outputs of the identical job could not be copied, so run it here as an ordinary job
+        returncode = _submit(socket_path, command, None, outputs)
+    return returncode
+
+
+# Returns the exit code of the job, or None if it was deduplicated but its outputs could not be copied
+def _submit(socket_path: Path, command: List[str], key: Optional[str], outputs: List[str]):
+    sock = _connect(socket_path)
+    if not sock:
+        return subprocess.call(command)
+
+    with sock, sock.makefile('rwb') as stream:
+        def send(message):
+            stream.write((json.dumps(message) + '\n').encode())
+            stream.flush()
+
+        send({'op': 'acquire', 'key': key, 'cwd': os.getcwd()})
+        reply = json.loads(stream.readline() or 'null')
+        if not reply:
+            raise ValueError(f'worker at {socket_path} closed the connection')
+        if 'error' in reply:
+            raise ValueError(f'worker at {socket_path} refused job: {reply["error"]}')
+
+        if reply['status'] == 'done':
+            return 0 if _copy_outputs(reply['cwd'], outputs) else None
+
+        returncode = subprocess.call(command)
+        send({'op': 'release', 'ok': returncode == 0})
+        return returncode
+
+
+def status(socket_path: Path = None):
+    socket_path = socket_path or default_socket_path()
+    sock = _connect(socket_path)
+    if not sock:
+        return None
+    with sock, sock.makefile('rwb') as stream:
+        stream.write(b'{"op": "status"}\n')
+        stream.flush()
+        reply = json.loads(stream.readline() or 'null')
+    if not reply:
+        raise ValueError(f'worker at {socket_path} closed the connection')
+    if 'error' in reply:
+        raise ValueError(f'worker at {socket_path} refused status request: {reply["error"]}')
+    return reply
@@ -0,0 +1,53 @@
+#include <Halide.h>
+using namespace Halide;
+
+class ${NAME.title().replace('_', '')} : public Generator<${NAME.title().replace('_', '')}>
+{
+public:
+	GeneratorParam<int> vector_width{"vector_width", 8};
+	GeneratorParam<int> parallel_split{"parallel_split", 64};  // rows per partial histogram, 0 for serial
+
+	Input<Buffer<uint8_t>> input{"input", 2};
+	Output<Buffer<int32_t>> output{"output", 1};
+
+	Var b, s;
+	Func partial;
+
+	void generate() {
+		// Each strip of parallel_split rows is counted into its own partial
+		// histogram so that the strips can be processed in parallel. When
+		// serial, the whole image is a single strip.
+		Expr rows = parallel_split > 0 ? Expr((int) parallel_split) : input.height();
+		RDom r(0, input.width(), 0, rows);
+		r.where(s * rows + r.y < input.height());
+
+		partial(b, s) = 0;
+		partial(cast<int>(input(r.x, s * rows + r.y)), s) += 1;
+
+		RDom strips(0, (input.height() + rows - 1) / rows);
+		output(b) = 0;
+		output(b) += partial(b, strips);
+	}
+
+	void schedule() {
+		input.set_estimates({{0, 1920}, {0, 1080}});
+		output.set_estimates({{0, 256}});
+
+		if (auto_schedule) {
+			return;
+		}
+
+		partial.compute_root()
+		       .vectorize(b, vector_width);
+		if (parallel_split > 0) {
+			partial.update()
+			       .parallel(s);
+		}
+
+		output.vectorize(b, vector_width);
+		output.update()
+		      .vectorize(b, vector_width);
+	}
+};
+
+HALIDE_REGISTER_GENERATOR(${NAME.title().replace('_', '')}, ${NAME})
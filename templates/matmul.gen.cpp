@@ -0,0 +1,57 @@
+#include <Halide.h>
+using namespace Halide;
+
+class ${NAME.title().replace('_', '')} : public Generator<${NAME.title().replace('_', '')}>
+{
+public:
+	GeneratorParam<int> tile_x{"tile_x", 32};
+	GeneratorParam<int> tile_y{"tile_y", 4};
+	GeneratorParam<int> vector_width{"vector_width", 8};
+	GeneratorParam<int> parallel_split{"parallel_split", 4};  // rows of tiles per parallel task, 0 for serial
+
+	Input<Buffer<float>> a{"a", 2};
+	Input<Buffer<float>> b{"b", 2};
+	Output<Buffer<float>> output{"output", 2};
+
+	Var x, y, xo, yo, xi, yi, t, yt;
+	Func prod;
+	RDom k;
+
+	void generate() {
+		k = RDom(0, a.width());
+
+		prod(x, y) = 0.0f;
+		prod(x, y) += a(k, y) * b(x, k);
+
+		output(x, y) = prod(x, y);
+	}
+
+	void schedule() {
+		a.set_estimates({{0, 1024}, {0, 1024}});
+		b.set_estimates({{0, 1024}, {0, 1024}});
+		output.set_estimates({{0, 1024}, {0, 1024}});
+
+		if (auto_schedule) {
+			return;
+		}
+
+		output.tile(x, y, xo, yo, xi, yi, tile_x, tile_y)
+		      .vectorize(xi, vector_width)
+		      .unroll(yi);
+		if (parallel_split > 0) {
+			output.split(yo, t, yt, parallel_split).parallel(t);
+		}
+
+		// Accumulate each tile in registers, walking k outermost so that
+		// rows of b are read contiguously.
+		prod.compute_at(output, xo)
+		    .vectorize(x, vector_width)
+		    .unroll(y);
+		prod.update()
+		    .reorder(x, y, k)
+		    .vectorize(x, vector_width)
+		    .unroll(y);
+	}
+};
+
+HALIDE_REGISTER_GENERATOR(${NAME.title().replace('_', '')}, ${NAME})
@@ -0,0 +1,36 @@
+#include <Halide.h>
+using namespace Halide;
+
+class ${NAME.title().replace('_', '')} : public Generator<${NAME.title().replace('_', '')}>
+{
+public:
+	GeneratorParam<int> vector_width{"vector_width", 8};
+	GeneratorParam<int> parallel_split{"parallel_split", 8};  // rows per parallel task, 0 for serial
+
+	Input<Buffer<float>> input{"input", 2};
+	Input<float> gain{"gain", 1.0f};
+	Output<Buffer<float>> output{"output", 2};
+
+	Var x, y, yo, yi;
+
+	void generate() {
+		output(x, y) = input(x, y) * gain;
+	}
+
+	void schedule() {
+		input.set_estimates({{0, 1920}, {0, 1080}});
+		gain.set_estimate(1.0f);
+		output.set_estimates({{0, 1920}, {0, 1080}});
+
+		if (auto_schedule) {
+			return;
+		}
+
+		output.vectorize(x, vector_width);
+		if (parallel_split > 0) {
+			output.split(y, yo, yi, parallel_split).parallel(yo);
+		}
+	}
+};
+
+HALIDE_REGISTER_GENERATOR(${NAME.title().replace('_', '')}, ${NAME})
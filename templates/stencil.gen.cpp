@@ -0,0 +1,43 @@
+#include <Halide.h>
+using namespace Halide;
+
+class ${NAME.title().replace('_', '')} : public Generator<${NAME.title().replace('_', '')}>
+{
+public:
+	GeneratorParam<int> tile_x{"tile_x", 256};
+	GeneratorParam<int> tile_y{"tile_y", 32};
+	GeneratorParam<int> vector_width{"vector_width", 8};
+	GeneratorParam<int> parallel_split{"parallel_split", 1};  // rows of tiles per parallel task, 0 for serial
+
+	Input<Buffer<float>> input{"input", 2};
+	Output<Buffer<float>> output{"output", 2};
+
+	Var x, y, xo, yo, xi, yi, t, yt;
+	Func clamped, blur_x;
+
+	void generate() {
+		clamped = BoundaryConditions::repeat_edge(input);
+		blur_x(x, y) = (clamped(x - 1, y) + clamped(x, y) + clamped(x + 1, y)) / 3;
+		output(x, y) = (blur_x(x, y - 1) + blur_x(x, y) + blur_x(x, y + 1)) / 3;
+	}
+
+	void schedule() {
+		input.set_estimates({{0, 1920}, {0, 1080}});
+		output.set_estimates({{0, 1920}, {0, 1080}});
+
+		if (auto_schedule) {
+			return;
+		}
+
+		output.tile(x, y, xo, yo, xi, yi, tile_x, tile_y)
+		      .vectorize(xi, vector_width);
+		if (parallel_split > 0) {
+			output.split(yo, t, yt, parallel_split).parallel(t);
+		}
+
+		blur_x.compute_at(output, xo)
+		      .vectorize(x, vector_width);
+	}
+};
+
+HALIDE_REGISTER_GENERATOR(${NAME.title().replace('_', '')}, ${NAME})
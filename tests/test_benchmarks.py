@@ -0,0 +1,21 @@
+from unittest import TestCase
+
+from benchmarks.suite import BENCHMARKS, SyntheticProject, run_suite, compare
+from src.makefile import Makefile
+
+
+class TestBenchmarks(TestCase):
+    def test_synthetic_project(self):
+        with SyntheticProject(5, configs_per_generator=3) as project:
+            cfgs, invalid = Makefile(project.root).get_generators()
+            self.assertEqual(invalid, [])
+            self.assertEqual(len(cfgs), 15)
+
+    def test_run_suite(self):
+        results = run_suite([3], repeat=1)
+        self.assertEqual(set(results), {f'{b.name}[3]' for b in BENCHMARKS})
+
+        # Anything much slower than an absurdly fast baseline is a regression
+        baseline = {key: dict(result, best=result['best'] / 100) for key, result in results.items()}
+        _, regressions = compare(results, baseline, 0.25)
+        self.assertEqual(set(regressions), set(results))
@@ -38,6 +38,24 @@ class TestProject(TestCase):
                               BuildConfig('gen2', None, ''),
                               BuildConfig('gen2', 'foo', 'bar=baz')})
 
+    def test_create_generator_from_template(self):
+        with TestCaseProject(self) as project:
+            project.create_generator('blur', 'stencil')
+
+            # Check that the template's configurations come along with it
+            cfgs, invalid = project.get_configurations()
+            self.assertEqual(invalid, [])
+            self.assertEqual(set(cfgs),
+                             {BuildConfig(project.name, None, ''),
+                              BuildConfig('blur', None, ''),
+                              BuildConfig('blur', 'small_tiles', 'tile_x=64 tile_y=16'),
+                              BuildConfig('blur', 'auto', 'auto_schedule=true')})
+
+            with open(project.root / 'blur.gen.cpp', 'r') as f:
+                self.assertIn('HALIDE_REGISTER_GENERATOR(Blur, blur)', f.read())
+
+            self.assertRaises(ValueError, lambda: project.create_generator('gen2', 'fft'))
+
     def test_delete_default_config(self):
         with TestCaseProject(self) as project:
             # Add new config, delete default
@@ -59,6 +77,13 @@ class TestProject(TestCase):
             self.assertEqual(cfgs, [])
             self.assertEqual(invalid, [])
 
+    def test_create_project_profile(self):
+        project = Project.create_new('profiled', 'debug')
+        with open(project.root / 'Makefile', 'r') as f:
+            self.assertIn('HLGEN_PROFILE ?= debug\n', f.readlines())
+
+        self.assertRaises(ValueError, lambda: Project.create_new('bad_profile', 'fast'))
+
     def tearDown(self) -> None:
         os.chdir(self._old_cwd)
         shutil.rmtree(self.test_root)
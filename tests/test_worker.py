@@ -0,0 +1,216 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase, mock
+
+from src.project import TOOL_DIR
+from src.worker import WorkerPool, create_server, job_key, status, submit
+
+# Logs each run to LOG, then waits for GO to exist before writing out/res.txt. Fails when run in a checkout
+# named 'fails', so that a leader can be made to fail without changing the command.
+JOB_SCRIPT = '''
+import os, sys, time
+log, go = sys.argv[1:]
+with open(log, 'a') as f:
+    f.write(os.getcwd() + '\\n')
+while not os.path.exists(go):
+    time.sleep(0.01)
+if os.path.basename(os.getcwd()) == 'fails':
+    sys.exit(1)
+os.makedirs('out', exist_ok=True)
+with open('out/res.txt', 'w') as f:
+    f.write(os.getcwd())
+'''
+
+
+def wait_until(pool, predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    with pool._cond:
+        while not predicate():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise AssertionError('timed out waiting for worker pool')
+            pool._cond.wait(min(remaining, 0.05))
+
+
+class TestWorkerPool(TestCase):
+    def test_job_key(self):
+        test_root = Path(tempfile.mkdtemp(suffix='.hltest'))
+        try:
+            for checkout, contents in [('a', 'same'), ('b', 'same'), ('c', 'different')]:
+                os.mkdir(test_root / checkout)
+                with open(test_root / checkout / 'in.txt', 'w') as f:
+                    f.write(contents)
+
+            def key(checkout, *args):
+                path = str(test_root / checkout / 'in.txt')
+                return job_key([path, *args], [path])
+
+            # The same job from two checkouts is identified by its input's contents, not its path
+            self.assertEqual(key('a', 'x=1'), key('b', 'x=1'))
+            self.assertNotEqual(key('a', 'x=1'), key('c', 'x=1'))
+            self.assertNotEqual(key('a', 'x=1'), key('a', 'x=2'))
+        finally:
+            shutil.rmtree(test_root)
+
+    def test_pool_deduplicates(self):
+        pool = WorkerPool(max_jobs=2, job_memory=1)
+        leader, is_leader = pool.acquire('key', 'a')
+        self.assertTrue(is_leader)
+
+        results = []
+        follower = threading.Thread(target=lambda: results.append(pool.acquire('key', 'b')))
+        follower.start()
+        wait_until(pool, lambda: pool.waiting == 1)
+
+        other, is_leader = pool.acquire('other', 'c')
+        self.assertTrue(is_leader)
+        pool.release(other, True)
+
+        pool.release(leader, True)
+        follower.join()
+        self.assertEqual(results, [(leader, False)])
+        self.assertEqual(pool.running, 0)
+
+    def test_pool_reruns_failed_job(self):
+        pool = WorkerPool(max_jobs=2, job_memory=1)
+        leader, _ = pool.acquire('key', 'a')
+
+        results = []
+        follower = threading.Thread(target=lambda: results.append(pool.acquire('key', 'b')))
+        follower.start()
+        wait_until(pool, lambda: pool.waiting == 1)
+
+        pool.release(leader, False)
+        follower.join()
+        job, is_leader = results[0]
+        self.assertTrue(is_leader)
+        self.assertIsNot(job, leader)
+        self.assertEqual(job.cwd, 'b')
+
+
+class TestWorkerServer(TestCase):
+    def setUp(self) -> None:
+        self.test_root = Path(tempfile.mkdtemp(suffix='.hltest'))
+        self.socket_path = self.test_root / 'worker.sock'
+        self.log = self.test_root / 'log'
+        self.go = self.test_root / 'go'
+        with open(self.test_root / 'job.py', 'w') as f:
+            f.write(JOB_SCRIPT)
+
+        self.pool = WorkerPool(max_jobs=2, job_memory=1)
+        self.server = create_server(self.socket_path, self.pool)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.start()
+
+    def checkout(self, name):
+        path = self.test_root / name
+        if not path.exists():
+            os.mkdir(path)
+            with open(path / 'in.txt', 'w') as f:
+                f.write('input')
+        return path
+
+    def start_job(self, checkout):
+        return subprocess.Popen([sys.executable, str(TOOL_DIR / 'hl'), 'submit', '--socket', str(self.socket_path),
+                                 '--input', 'in.txt', '--output', 'out/res.txt', '--',
+                                 sys.executable, str(self.test_root / 'job.py'), str(self.log), str(self.go)],
+                                cwd=str(self.checkout(checkout)), stderr=subprocess.DEVNULL)
+
+    def runs(self):
+        with open(self.log, 'r') as f:
+            return f.read().splitlines()
+
+    # Starts a leader in the first checkout and a follower in the second, then lets the leader finish
+    def run_pair(self, leader_checkout, follower_checkout):
+        leader = self.start_job(leader_checkout)
+        wait_until(self.pool, lambda: self.pool.running == 1)
+        follower = self.start_job(follower_checkout)
+        wait_until(self.pool, lambda: self.pool.waiting == 1)
+        self.go.touch()
+        return leader.wait(10), follower.wait(10)
+
+    def test_shares_job_between_checkouts(self):
+        self.assertEqual(self.run_pair('a', 'b'), (0, 0))
+        self.assertEqual(self.runs(), [str(self.test_root / 'a')])
+        for checkout in ['a', 'b']:
+            with open(self.test_root / checkout / 'out' / 'res.txt', 'r') as f:
+                self.assertEqual(f.read(), str(self.test_root / 'a'))
+
+    def test_shares_job_within_checkout(self):
+        self.assertEqual(self.run_pair('a', 'a'), (0, 0))
+        self.assertEqual(len(self.runs()), 1)
+
+    def test_reruns_failed_job(self):
+        self.assertEqual(self.run_pair('fails', 'b'), (1, 0))
+        self.assertEqual(self.runs(), [str(self.test_root / 'fails'), str(self.test_root / 'b')])
+        self.assertTrue((self.test_root / 'b' / 'out' / 'res.txt').is_file())
+
+    def test_reruns_job_when_copy_fails(self):
+        leader = self.start_job('a')
+        wait_until(self.pool, lambda: self.pool.running == 1)
+
+        # The follower runs in this process, so that copying the leader's outputs can be made to fail
+        results = []
+        command = [sys.executable, str(self.test_root / 'job.py'), str(self.log), str(self.go)]
+        old_cwd = os.getcwd()
+        os.chdir(self.checkout('b'))
+        try:
+            with mock.patch('src.worker._copy_outputs', return_value=False):
+                follower = threading.Thread(target=lambda: results.append(
+                    submit(command, inputs=['in.txt'], outputs=['out/res.txt'], socket_path=self.socket_path)))
+                follower.start()
+                wait_until(self.pool, lambda: self.pool.waiting == 1)
+                self.go.touch()
+                follower.join()
+        finally:
+            os.chdir(old_cwd)
+
+        self.assertEqual(leader.wait(10), 0)
+        self.assertEqual(results, [0])
+        self.assertEqual(self.runs(), [str(self.test_root / 'a'), str(self.test_root / 'b')])
+
+    def test_status(self):
+        self.assertEqual(status(self.socket_path), {'running': 0, 'waiting': 0, 'max_jobs': 2})
+
+    def test_refuses_other_users(self):
+        with mock.patch('src.worker.os.getuid', return_value=os.getuid() + 1):
+            self.assertRaises(ValueError, lambda: submit(['true'], socket_path=self.socket_path))
+
+    def test_status_refused(self):
+        with mock.patch('src.worker.os.getuid', return_value=os.getuid() + 1):
+            self.assertRaises(ValueError, lambda: status(self.socket_path))
+
+    def test_permission_denied(self):
+        # Connecting to another user's worker fails with EACCES. That is an error, not a reason to run outside the pool.
+        marker = self.test_root / 'ran'
+        command = [sys.executable, '-c', f'open({str(marker)!r}, "w").close()']
+        with mock.patch.object(socket.socket, 'connect', side_effect=PermissionError(13, 'Permission denied')):
+            self.assertRaises(ValueError, lambda: submit(command, socket_path=self.socket_path))
+            self.assertRaises(ValueError, lambda: status(self.socket_path))
+        self.assertFalse(marker.exists())
+
+    def test_stale_socket(self):
+        stale_path = self.test_root / 'stale.sock'
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(stale_path))
+        stale.close()
+
+        self.assertIsNone(status(stale_path))
+        self.assertEqual(submit([sys.executable, '-c', 'exit(3)'], socket_path=stale_path), 3)
+
+    def test_submit_without_worker(self):
+        socket_path = self.test_root / 'missing.sock'
+        self.assertEqual(submit([sys.executable, '-c', 'exit(3)'], socket_path=socket_path), 3)
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+        shutil.rmtree(self.test_root)